@@ -1,9 +1,9 @@
 import json
 import logging
 import os
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List
 
 from tqdm import tqdm
 
@@ -62,6 +62,24 @@ def _worker(path: Path, base_dir: Path, output_root: Path, cfg: Dict, dry_run: b
     return record
 
 
+def _summarize(results: List[Dict], in_place: bool, dry_run: bool) -> Dict:
+    total_bytes_before = sum(r.get("original_size", 0) or 0 for r in results)
+    total_bytes_after = sum(r.get("new_size", 0) or 0 for r in results if r.get("new_size"))
+    summary = {
+        "total_files": len(results),
+        "optimized_files": sum(1 for r in results if r.get("status") == "optimized"),
+        "unsupported_files": sum(1 for r in results if r.get("status") == "unsupported"),
+        "error_files": sum(1 for r in results if r.get("status") == "error"),
+        "bytes_before": total_bytes_before,
+        "bytes_after": total_bytes_after,
+        "bytes_saved": max(total_bytes_before - total_bytes_after, 0),
+        "percent_saved": round((max(total_bytes_before - total_bytes_after, 0) / total_bytes_before) * 100, 2) if total_bytes_before > 0 else 0.0,
+        "in_place": in_place,
+        "dry_run": dry_run,
+    }
+    return summary
+
+
 def _iter_files(root: Path, recursive: bool) -> List[Path]:
     if recursive:
         return [p for p in root.rglob("*") if p.is_file()]
@@ -84,29 +102,11 @@ def process_directory(
     if not dry_run and not in_place:
         output_root.mkdir(parents=True, exist_ok=True)
     results: List[Dict] = []
-    total_bytes_before = 0
-    total_bytes_after = 0
     with ProcessPoolExecutor(max_workers=max(1, workers)) as ex:
         futures = [ex.submit(_worker, f, dir_path, output_root, cfg, dry_run, in_place) for f in files]
         for fut in tqdm(as_completed(futures), total=len(futures), desc="Processando"):
-            rec = fut.result()
-            results.append(rec)
-            total_bytes_before += rec.get("original_size", 0) or 0
-            if rec.get("new_size"):
-                total_bytes_after += rec.get("new_size", 0) or 0
-    summary = {
-        "total_files": len(results),
-        "optimized_files": sum(1 for r in results if r.get("status") == "optimized"),
-        "unsupported_files": sum(1 for r in results if r.get("status") == "unsupported"),
-        "error_files": sum(1 for r in results if r.get("status") == "error"),
-        "bytes_before": total_bytes_before,
-        "bytes_after": total_bytes_after,
-        "bytes_saved": max(total_bytes_before - total_bytes_after, 0),
-        "percent_saved": round((max(total_bytes_before - total_bytes_after, 0) / total_bytes_before) * 100, 2) if total_bytes_before > 0 else 0.0,
-        "in_place": in_place,
-        "dry_run": dry_run,
-    }
-    report = {"summary": summary, "results": results}
+            results.append(fut.result())
+    report = {"summary": _summarize(results, in_place, dry_run), "results": results}
     if output_report:
         try:
             with open(output_report, "w", encoding="utf-8") as f:
@@ -116,6 +116,40 @@ def process_directory(
     return report
 
 
+def process_stream(
+    files: Iterable[Path],
+    base_dir: Path,
+    output_root: Path,
+    cfg: Dict,
+    workers: int,
+    on_result: Callable[[Dict], None] | None = None,
+) -> Dict:
+    # Keeps at most 2 * workers files in flight; the iterator is only advanced when a
+    # slot frees up, so a slow pool throttles the producer (e.g. a live upload).
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", filename="photo-slimmer.log")
+    output_root.mkdir(parents=True, exist_ok=True)
+    max_pending = max(1, workers) * 2
+    results: List[Dict] = []
+    pending = set()
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as ex, tqdm(desc="Processando") as bar:
+
+        def _collect(done) -> None:
+            for fut in done:
+                rec = fut.result()
+                results.append(rec)
+                if on_result:
+                    on_result(rec)
+                bar.update(1)
+
+        for f in files:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending.add(ex.submit(_worker, f, base_dir, output_root, cfg, False, False))
+        _collect(as_completed(pending))
+    return {"summary": _summarize(results, False, False), "results": results}
+
+
 def preview_file(file_path: Path, cfg: Dict) -> Dict:
     orig, new, meta = utils.estimate_new_size(file_path, cfg)
     return {
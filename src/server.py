@@ -1,11 +1,14 @@
-import io
+import itertools
 import json
+import re
 import tempfile
 import zipfile
 from pathlib import Path
-from typing import Dict
+from typing import Dict, IO, Iterator, Tuple
 
 from flask import Flask, request, send_file, send_from_directory, jsonify
+from werkzeug.exceptions import BadRequest, HTTPException, RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
 
 import config
 import processor
@@ -16,6 +19,8 @@ WEB_DIR = APP_DIR / "web"
 if not WEB_DIR.exists():
     WEB_DIR = Path.cwd() / "web"
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 app = Flask(__name__)
 
 
@@ -29,8 +34,14 @@ def static_files(path: str):
     return send_from_directory(str(WEB_DIR), path)
 
 
+CONFIG_FIELDS = ("quality", "webp", "max_width", "max_height", "keep_exif", "workers")
+
+
 def _cfg_from_request(base_cfg: Dict) -> Dict:
-    data = request.form or request.json or {}
+    return _cfg_from_data(base_cfg, request.form or request.json or {})
+
+
+def _cfg_from_data(base_cfg: Dict, data: Dict) -> Dict:
     override = {
         "quality": int(data.get("quality")) if data.get("quality") else None,
         "webp": True if str(data.get("webp", "true")).lower() in {"true", "1", "on"} else False,
@@ -56,35 +67,159 @@ def api_preview():
         return res
 
 
+def _safe_relname(filename: str) -> str:
+    parts = filename.replace("\x00", "").replace("\\", "/").split("/")
+    return "/".join(part for part in parts if part not in {"", ".", ".."})
+
+
+def _safe_suffix(name: str) -> str:
+    suffix = Path(name).suffix
+    return suffix if re.fullmatch(r"\.[A-Za-z0-9]{1,10}", suffix) else ""
+
+
+def _upload_error(e: HTTPException):
+    if isinstance(e, RequestEntityTooLarge):
+        return {"error": "upload_too_large"}, 413
+    return {"error": e.description}, e.code
+
+
+def _stream_uploads(
+    stream: IO[bytes], boundary: str, dest_dir: Path, fields: Dict, max_field_size: int | None
+) -> Iterator[Tuple[Path, str]]:
+    # Yields (disk path, client name) for each file as soon as its part is complete; form
+    # fields land in ``fields`` as they arrive, so anything sent before a file is known
+    # when it is yielded. Parts are stored under index-based names so that uploads
+    # sharing a filename never overwrite each other and nothing lands outside dest_dir;
+    # the client name only loses traversal segments, so Unicode and spaces survive.
+    decoder = MultipartDecoder(boundary.encode("latin-1"), max_form_memory_size=max_field_size)
+    field_name = None
+    field_buf = bytearray()
+    out = None
+    dest = None
+    name = None
+    index = 0
+    finished = False
+    try:
+        while not finished:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            try:
+                decoder.receive_data(chunk or None)
+                event = decoder.next_event()
+            except ValueError:
+                raise BadRequest("invalid_upload")
+            while not isinstance(event, NeedData):
+                if isinstance(event, File):
+                    field_name = None
+                    if event.name == "files" and event.filename:
+                        index += 1
+                        name = _safe_relname(event.filename)
+                        dest = dest_dir / f"{index:05d}{_safe_suffix(name)}"
+                        name = name or dest.name
+                        out = open(dest, "wb")
+                    else:
+                        dest = None
+                elif isinstance(event, Field):
+                    field_name = event.name
+                    field_buf.clear()
+                elif isinstance(event, Data):
+                    if out is not None:
+                        out.write(event.data)
+                    elif field_name is not None:
+                        field_buf += event.data
+                        if max_field_size is not None and len(field_buf) > max_field_size:
+                            raise RequestEntityTooLarge()
+                    if not event.more_data:
+                        if out is not None:
+                            out.close()
+                            out = None
+                            yield dest, name
+                        elif field_name is not None:
+                            fields[field_name] = field_buf.decode("utf-8", "replace")
+                        field_name = None
+                        dest = None
+                elif isinstance(event, Epilogue):
+                    finished = True
+                    break
+                try:
+                    event = decoder.next_event()
+                except ValueError:
+                    raise BadRequest("invalid_upload")
+            if not chunk:
+                break
+    finally:
+        if out is not None:
+            out.close()
+
+
 @app.post("/api/optimize")
 def api_optimize():
     base_cfg = config.load_config(None)
-    cfg = _cfg_from_request(base_cfg)
-    files = request.files.getlist("files")
-    if not files:
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
         return {"error": "files_required"}, 400
     with tempfile.TemporaryDirectory() as td:
         tmp_dir = Path(td) / "input"
+        out_root = Path(td) / "optimized"
         tmp_dir.mkdir(parents=True, exist_ok=True)
-        for f in files:
-            dest = tmp_dir / f.filename
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            f.save(dest)
-        report = processor.process_directory(tmp_dir, cfg, True, False, int(cfg.get("workers")), False, None)
-        bio = io.BytesIO()
-        with zipfile.ZipFile(bio, "w", zipfile.ZIP_DEFLATED) as zf:
-            for r in report["results"]:
-                if r.get("status") == "optimized":
-                    p = Path(r["path"])
-                    rel = p.relative_to(tmp_dir)
-                    out_root = tmp_dir / "optimized"
-                    optimized_path = out_root / rel
-                    optimized_path = optimized_path.with_suffix(Path(r["path"]).suffix if not cfg.get("webp", True) else ".webp")
-                    if optimized_path.exists():
-                        zf.write(optimized_path, arcname=str(rel.with_suffix(optimized_path.suffix)))
+        fields: Dict = {}
+        try:
+            uploads = _stream_uploads(request.stream, boundary, tmp_dir, fields, request.max_form_memory_size)
+            first = next(uploads, None)
+        except HTTPException as e:
+            return _upload_error(e)
+        if first is None:
+            return {"error": "files_required"}, 400
+        # processing starts now, so config fields sent after the first file cannot apply
+        cfg = _cfg_from_data(base_cfg, fields)
+        early_fields = set(fields)
+        names: Dict[str, str] = {}
+        arcnames = set()
+
+        def _check_late_fields() -> None:
+            if any(k in fields and k not in early_fields for k in CONFIG_FIELDS):
+                raise BadRequest("config_after_files")
+
+        def _paths() -> Iterator[Path]:
+            for path, name in itertools.chain([first], uploads):
+                _check_late_fields()
+                names[str(path)] = name
+                yield path
+            _check_late_fields()
+
+        # spool the archive to an anonymous temp file so memory stays flat
+        archive = tempfile.TemporaryFile()
+        zf = zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED)
+
+        def _add_result(r: Dict) -> None:
+            p = Path(r["path"])
+            name = names[str(p)]
+            # report the client's filename rather than the temp file it was stored under
+            r["path"] = name
+            optimized_path = (out_root / p.name).with_suffix(p.suffix if not cfg.get("webp", True) else ".webp")
+            if r.get("status") == "optimized" and optimized_path.exists():
+                stem = str(Path(name).with_suffix(""))
+                arcname = f"{stem}{optimized_path.suffix}"
+                n = 1
+                while arcname in arcnames:
+                    arcname = f"{stem}-{n}{optimized_path.suffix}"
+                    n += 1
+                arcnames.add(arcname)
+                zf.write(optimized_path, arcname=arcname)
+            optimized_path.unlink(missing_ok=True)
+            p.unlink(missing_ok=True)
+
+        try:
+            report = processor.process_stream(_paths(), tmp_dir, out_root, cfg, int(cfg.get("workers")), _add_result)
             zf.writestr("report.json", json.dumps(report, ensure_ascii=False, indent=2))
-        bio.seek(0)
-        return send_file(bio, mimetype="application/zip", download_name="optimized.zip", as_attachment=True)
+        except Exception as e:
+            zf.close()
+            archive.close()
+            if isinstance(e, HTTPException):
+                return _upload_error(e)
+            raise
+        zf.close()
+        archive.seek(0)
+        return send_file(archive, mimetype="application/zip", download_name="optimized.zip", as_attachment=True)
 
 
 @app.errorhandler(404)
@@ -62,4 +62,33 @@ def test_unsupported_heic():
         cfg = config.load_config(None)
         rep = processor.process_directory(Path(td), cfg, False, True, max(1, cfg["workers"]), False, None)
         statuses = {r["status"] for r in rep["results"]}
-        assert "unsupported" in statuses or "error" in statuses
\ No newline at end of file
+        assert "unsupported" in statuses or "error" in statuses
+
+
+def test_process_stream_applies_back_pressure(tmp_path: Path):
+    import processor
+    import config
+    d = tmp_path / "input"
+    out = tmp_path / "optimized"
+    names = [f"{i}.jpg" for i in range(6)]
+    produced = []
+    produced_at_first_result = []
+
+    def _produce():
+        for name in names:
+            p = d / name
+            _make_image(p, fmt="JPEG")
+            produced.append(name)
+            yield p
+
+    def _on_result(r):
+        if not produced_at_first_result:
+            produced_at_first_result.append(len(produced))
+
+    cfg = config.load_config(None)
+    rep = processor.process_stream(_produce(), d, out, cfg, 1, _on_result)
+    # workers=1 allows two jobs in flight; the third item is pulled before the first wait
+    assert produced_at_first_result[0] <= 3
+    assert rep["summary"]["total_files"] == 6
+    assert rep["summary"]["optimized_files"] == 6
+    assert (out / "0.webp").exists()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import io
+import json
+import sys
+import pathlib
+import zipfile
+
+from PIL import Image
+
+# ensure src path in sys.path
+SRC_PATH = pathlib.Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_PATH))
+
+BOUNDARY = "testboundary"
+
+
+def _jpeg_bytes(color=(128, 128, 128)) -> bytes:
+    bio = io.BytesIO()
+    Image.new("RGB", (320, 240), color).save(bio, format="JPEG")
+    return bio.getvalue()
+
+
+def _field(name: str, value: str) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n"
+    ).encode("utf-8")
+
+
+def _file(filename: str, data: bytes) -> bytes:
+    head = (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"{filename}\"\r\n"
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode("utf-8")
+    return head + data + b"\r\n"
+
+
+def _post(body: bytes):
+    import server
+    client = server.app.test_client()
+    return client.post(
+        "/api/optimize", data=body, content_type=f"multipart/form-data; boundary={BOUNDARY}"
+    )
+
+
+def _zip(res) -> zipfile.ZipFile:
+    assert res.status_code == 200
+    return zipfile.ZipFile(io.BytesIO(res.data))
+
+
+def test_optimize_upload():
+    body = _field("workers", "1") + _file("a.jpg", _jpeg_bytes()) + _file("b.jpg", _jpeg_bytes()) + f"--{BOUNDARY}--\r\n".encode()
+    zf = _zip(_post(body))
+    assert sorted(zf.namelist()) == ["a.webp", "b.webp", "report.json"]
+    report = json.loads(zf.read("report.json"))
+    assert report["summary"]["optimized_files"] == 2
+    assert sorted(r["path"] for r in report["results"]) == ["a.jpg", "b.jpg"]
+
+
+def test_optimize_applies_fields_sent_before_files():
+    body = _field("workers", "1") + _field("webp", "false") + _file("sub/a.jpg", _jpeg_bytes()) + f"--{BOUNDARY}--\r\n".encode()
+    zf = _zip(_post(body))
+    assert sorted(zf.namelist()) == ["report.json", "sub/a.jpg"]
+
+
+def test_optimize_rejects_config_after_files():
+    body = _field("workers", "1") + _file("a.jpg", _jpeg_bytes()) + _field("quality", "10") + f"--{BOUNDARY}--\r\n".encode()
+    res = _post(body)
+    assert res.status_code == 400
+    assert res.get_json() == {"error": "config_after_files"}
+
+
+def test_optimize_duplicate_filenames():
+    body = _field("workers", "1")
+    for i in range(6):
+        body += _file("dup.jpg", _jpeg_bytes((i * 40, 0, 0)))
+    body += f"--{BOUNDARY}--\r\n".encode()
+    zf = _zip(_post(body))
+    names = zf.namelist()
+    assert len(names) == 7
+    assert "dup.webp" in names and "dup-5.webp" in names
+    assert json.loads(zf.read("report.json"))["summary"]["optimized_files"] == 6
+
+
+def test_optimize_sanitizes_filenames():
+    body = _field("workers", "1") + _file("../../evil.jpg", _jpeg_bytes()) + _file("/abs/x.jpg", _jpeg_bytes()) + f"--{BOUNDARY}--\r\n".encode()
+    zf = _zip(_post(body))
+    assert sorted(zf.namelist()) == ["abs/x.webp", "evil.webp", "report.json"]
+
+
+def test_optimize_keeps_unicode_filenames():
+    body = _field("workers", "1") + _file("照片.jpg", _jpeg_bytes()) + _file("fotos/Férias praia.jpg", _jpeg_bytes()) + f"--{BOUNDARY}--\r\n".encode()
+    zf = _zip(_post(body))
+    assert sorted(zf.namelist()) == ["fotos/Férias praia.webp", "report.json", "照片.webp"]
+    report = json.loads(zf.read("report.json"))
+    assert {r["status"] for r in report["results"]} == {"optimized"}
+    assert sorted(r["path"] for r in report["results"]) == ["fotos/Férias praia.jpg", "照片.jpg"]
+
+
+def test_optimize_malformed_body():
+    res = _post(b"this is not multipart")
+    assert res.status_code == 400
+    assert res.get_json() == {"error": "invalid_upload"}
+
+
+def test_optimize_truncated_body():
+    body = _field("workers", "1") + _file("a.jpg", _jpeg_bytes()) + _file("b.jpg", _jpeg_bytes())[:-200]
+    res = _post(body)
+    assert res.status_code == 400
+    assert res.get_json() == {"error": "invalid_upload"}
+
+
+def test_optimize_rejects_oversized_field():
+    body = _field("quality", "9" * 600_000) + _file("a.jpg", _jpeg_bytes()) + f"--{BOUNDARY}--\r\n".encode()
+    res = _post(body)
+    assert res.status_code == 413
+    assert res.get_json() == {"error": "upload_too_large"}
\ No newline at end of file